@@ -1,8 +1,9 @@
-import json
 import os
 import sys
-from typing import Dict, List
+from collections import deque
+from typing import Deque, Dict, List
 
+import orjson
 import typer
 
 # --- PATH SETUP ---
@@ -26,8 +27,9 @@ def load_log_file(file_path: str) -> List[Dict]:
     Returns an empty list on failure to preserve current CLI behavior.
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as file_handle:
-            return json.load(file_handle)
+        # orjson parses raw bytes directly, skipping the text-decode step.
+        with open(file_path, "rb") as file_handle:
+            return orjson.loads(file_handle.read())
     except Exception as exc:
         # REVIEW NOTE (not changed): Uses print instead of logging to preserve
         # current runtime behavior and output destination.
@@ -114,15 +116,15 @@ def test_generation() -> None:
     print(f"\nUser Query: '{query}'")
     print("(Context: User HATES Java, LOVES Python)\n")
 
-    # 3) Generate.
-    response = generator.generate_response(
+    # 3) Generate, printing tokens as they arrive.
+    print("--- AI RESPONSE ---")
+    for delta in generator.stream_response(
         user_query=query,
         context_messages=[],  # No recent chat.
         session_memory=fake_memory,
-    )
-
-    print("--- AI RESPONSE ---")
-    print(response)
+    ):
+        print(delta, end="", flush=True)
+    print()
 
 
 @app.command()
@@ -149,7 +151,7 @@ def run_log(file_path: str) -> None:
 
     # Simulated state.
     session_memory = None
-    processed_messages: List[Dict] = []
+    recent_context: Deque[Dict] = deque(maxlen=5)  # Last 5 processed messages.
 
     print(f"▶️ Starting simulation with {len(messages)} messages...\n")
 
@@ -169,7 +171,7 @@ def run_log(file_path: str) -> None:
             print("   🕵️ [Flow 2] Analyzing Query...")
             analysis = pipeline.analyze_query(
                 content,
-                processed_messages[-5:],
+                list(recent_context),
                 session_memory,
             )
 
@@ -198,26 +200,28 @@ def run_log(file_path: str) -> None:
                 # because the log may already include an assistant response.
 
         # Append to history.
-        processed_messages.append(msg)
+        memory_manager.append_message(msg)
+        recent_context.append(msg)
 
         # 3) Memory check (Flow 1).
-        if memory_manager.should_summarize(processed_messages):
+        if memory_manager.should_summarize():
             print("   💾 [Flow 1] MEMORY TRIGGERED! (Buffer exceeded threshold)")
             print("   ⏳ Consolidating...")
             session_memory = memory_manager.summarize_messages(
-                processed_messages,
+                memory_manager.buffered_messages,
                 session_memory,
             )
             print("   ✅ Consolidation Complete. New Memory State:")
             print(
-                session_memory.model_dump_json(
-                    indent=2,
-                    exclude={"message_range_summarized"},
-                )
+                orjson.dumps(
+                    session_memory.model_dump(exclude={"message_range_summarized"}),
+                    option=orjson.OPT_INDENT_2,
+                ).decode()
             )
 
-            # Reset simulated buffer (in production, this would trim the message list).
-            processed_messages = []
+            # Reset simulated buffer by dropping the summarized messages.
+            memory_manager.drop_front(len(memory_manager.buffered_messages))
+            recent_context.clear()
 
         print("")
 
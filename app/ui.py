@@ -1,9 +1,14 @@
-import json
+import asyncio
+import copy
+import mmap
 import os
 import sys
 import time
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
+import orjson
 import streamlit as st
 
 # --- PATH SETUP ---
@@ -14,12 +19,14 @@ if root_dir not in sys.path:
 
 # --- IMPORTS ---
 from src.config import settings
+from src.core.http import run_async
 from src.core.llm import ChatGenerator
 from src.core.memory import MemoryManager
 from src.core.pipeline import QueryPipeline
+from src.schemas.chat import QueryAnalysis
 from src.schemas.memory import MessageRange, SessionSummary, UserProfile
-from src.utils.storage import load_json, save_json
-from src.utils.tokenizer import count_messages_tokens
+from src.utils.fast_extract import fast_extract
+from src.utils.storage import append_jsonl, load_json, load_jsonl, save_json
 
 # --- CONFIG PAGE ---
 st.set_page_config(
@@ -30,7 +37,14 @@ st.set_page_config(
 st.markdown("<style>.stDeployButton{display:none;}</style>", unsafe_allow_html=True)
 
 # --- INITIALIZE STATE ---
+# Number of most recent messages passed as short-term context.
+RECENT_CONTEXT_SIZE = 5
+
 MEMORY_PATH = os.path.join(root_dir, "data", "session_memory.json")
+# Append-only journal of per-consolidation deltas on top of the snapshot.
+MEMORY_JOURNAL_PATH = os.path.join(root_dir, "data", "session_memory.jsonl")
+# Fold the journal into the snapshot once it outgrows the snapshot this much.
+MEMORY_COMPACTION_RATIO = 10
 
 DATA_DIR = os.path.join(root_dir, "data")
 if not os.path.exists(DATA_DIR):
@@ -39,10 +53,41 @@ if not os.path.exists(DATA_DIR):
 # 1) Init messages
 if "messages" not in st.session_state:
     st.session_state.messages = []
+    # Bounded mirror of the tail of `messages` for O(1) recent-context access.
+    st.session_state.recent_context = deque(maxlen=RECENT_CONTEXT_SIZE)
+    # Serialized form of `recent_context`, rebuilt lazily after it changes.
+    st.session_state.recent_prompt_cache = None
+
+
+# --- PERSISTENCE (process-wide singletons) ---
+@st.cache_resource
+def get_memory_writer() -> ThreadPoolExecutor:
+    """Return the background writer for memory snapshots.
+
+    A single worker keeps writes ordered, so the latest summary always wins.
+    """
+    return ThreadPoolExecutor(max_workers=1)
+
+
+@st.cache_resource
+def get_persisted_memory() -> Dict[str, Any]:
+    """Return the memory dump as it is on disk (snapshot + replayed journal).
+
+    Journal deltas are diffed against this state, so replaying them always
+    rebuilds the last written dump. Only tasks on the memory writer may read
+    or mutate it.
+    """
+    data = load_json(MEMORY_PATH) or {}
+    # Replay journaled deltas on top of the last compacted snapshot.
+    for entry in load_jsonl(MEMORY_JOURNAL_PATH):
+        data.update(entry["delta"])
+    return data
+
 
 # 2) Init session summary (load from disk if exists)
 if "session_summary" not in st.session_state:
-    data = load_json(MEMORY_PATH)
+    # Read through the writer so writes queued by other sessions land first.
+    data = get_memory_writer().submit(dict, get_persisted_memory()).result()
     if data:
         try:
             st.session_state.session_summary = SessionSummary(**data)
@@ -63,34 +108,211 @@ if "pending_options" not in st.session_state:
 if "test_prompt" not in st.session_state:
     st.session_state.test_prompt = None
 
-# Lazy-load core modules
+
+# --- CORE MODULES (process-wide singletons) ---
+@st.cache_resource
+def get_pipeline() -> QueryPipeline:
+    """Return the shared query pipeline (built once per server process)."""
+    return QueryPipeline()
+
+
+@st.cache_resource
+def get_generator() -> ChatGenerator:
+    """Return the shared chat generator (built once per server process)."""
+    return ChatGenerator()
+
+
+@st.cache_resource
+def get_memory_manager() -> MemoryManager:
+    """Return the shared memory manager (built once per server process)."""
+    return MemoryManager()
+
+
+query_pipeline = get_pipeline()
+chat_generator = get_generator()
+
+# The threshold is tuned per session from the sidebar, so each session gets a
+# shallow copy that shares the cached client but owns its threshold and its
+# token-counted buffer of unsummarized messages.
 if "memory_manager" not in st.session_state:
-    st.session_state.memory_manager = MemoryManager()
-if "query_pipeline" not in st.session_state:
-    st.session_state.query_pipeline = QueryPipeline()
-if "chat_generator" not in st.session_state:
-    st.session_state.chat_generator = ChatGenerator()
+    st.session_state.memory_manager = copy.copy(get_memory_manager())
+    st.session_state.memory_manager.reset_buffer(
+        st.session_state.messages[st.session_state.last_summary_index :]
+    )
+
+
+# --- HELPER: CACHED MEMORY DUMP ---
+def session_summary_dict() -> Optional[Dict[str, Any]]:
+    """Return `session_summary.model_dump()`, rebuilt only when the summary changes.
+
+    The dump is memoized on the summary itself per mutation version, so reruns
+    that do not touch memory reuse the previous dict, and a replaced summary
+    can never be served another object's dump.
+    """
+    summary = st.session_state.session_summary
+    if summary is None:
+        return None
+
+    return summary.memoize("dump", lambda: summary.model_dump(mode="python"))
+
+
+# --- HELPER: MEMORY PERSISTENCE ---
+def persist_memory(persisted: Dict[str, Any], snapshot: Dict[str, Any]) -> None:
+    """Journal the fields of `snapshot` that differ from the persisted dump.
+
+    Runs on the background writer, so journal appends, compactions, and
+    updates to `persisted` (see `get_persisted_memory`) stay ordered.
+    """
+    delta = {key: value for key, value in snapshot.items() if persisted.get(key) != value}
+    if not delta:
+        return
+
+    append_jsonl({"ts": time.time(), "delta": delta}, MEMORY_JOURNAL_PATH)
+    persisted.update(delta)
+
+    snapshot_size = os.path.getsize(MEMORY_PATH) if os.path.exists(MEMORY_PATH) else 0
+    if os.path.getsize(MEMORY_JOURNAL_PATH) > MEMORY_COMPACTION_RATIO * snapshot_size:
+        save_json(persisted, MEMORY_PATH)
+        os.remove(MEMORY_JOURNAL_PATH)
+
+
+def clear_persisted_memory(persisted: Dict[str, Any]) -> None:
+    """Remove persisted memory files and forget the persisted dump (writer task)."""
+    persisted.clear()
+    for path in (MEMORY_PATH, MEMORY_JOURNAL_PATH):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def submit_memory_snapshot() -> None:
+    """Queue persistence of the current session summary.
+
+    The write runs on the background writer, so callers can keep rendering
+    (e.g., stream the response) while it completes.
+    """
+    snapshot = session_summary_dict()
+    if snapshot is not None:
+        get_memory_writer().submit(persist_memory, get_persisted_memory(), snapshot)
+
+
+# Messages longer than this may say more than the regex fast path captures.
+FAST_EXTRACT_MAX_CHARS = 280
+# Only fall back to the LLM when few messages need it; otherwise trust regex.
+HYDRATION_LLM_FALLBACK_LIMIT = 8
+
+
+# --- HELPER: CONCURRENT HYDRATION ---
+async def _analyze_history(queries: List[str]) -> List[QueryAnalysis]:
+    """Analyze historical user messages concurrently.
+
+    Parallelism is bounded by the pipeline's shared request semaphore.
+    """
+    return await asyncio.gather(
+        *(query_pipeline.aanalyze_query(query, [], None) for query in queries)
+    )
+
+
+def _hydrate_analyses(queries: List[str]) -> List[QueryAnalysis]:
+    """Extract memory signals from historical user messages.
+
+    Uses the regex fast path first and routes only unmatched or long messages
+    to the LLM, and only while there are few enough of them.
+    """
+    analyses = [fast_extract(query) for query in queries]
+    fallback = [
+        index
+        for index, (query, analysis) in enumerate(zip(queries, analyses))
+        if analysis is None or len(query) > FAST_EXTRACT_MAX_CHARS
+    ]
+
+    if fallback and len(fallback) <= HYDRATION_LLM_FALLBACK_LIMIT:
+        llm_analyses = run_async(_analyze_history([queries[index] for index in fallback]))
+        for index, analysis in zip(fallback, llm_analyses):
+            analyses[index] = analysis
+
+    return [analysis for analysis in analyses if analysis is not None]
+
+
+# --- HELPER: MESSAGE HISTORY ---
+def set_messages(messages: List[Dict[str, Any]]) -> None:
+    """Replace the chat history and rebuild the recent-context window and buffer."""
+    st.session_state.messages = messages
+    st.session_state.memory_manager.reset_buffer(
+        messages[st.session_state.last_summary_index :]
+    )
+    st.session_state.recent_context = deque(
+        messages[-RECENT_CONTEXT_SIZE:],
+        maxlen=RECENT_CONTEXT_SIZE,
+    )
+    st.session_state.recent_prompt_cache = None
+
+
+def append_message(message: Dict[str, Any]) -> None:
+    """Append a message to the chat history, recent-context window, and buffer."""
+    st.session_state.messages.append(message)
+    st.session_state.memory_manager.append_message(message)
+    st.session_state.recent_context.append(message)
+    st.session_state.recent_prompt_cache = None
+
+
+def recent_history_json() -> str:
+    """Return the recent-context window serialized for the query pipeline.
+
+    The string is rebuilt only after the window changes, so reruns without new
+    messages skip re-serializing it.
+    """
+    if st.session_state.recent_prompt_cache is None:
+        st.session_state.recent_prompt_cache = QueryPipeline.serialize_history(
+            list(st.session_state.recent_context)
+        )
+    return st.session_state.recent_prompt_cache
 
 
 # --- HELPER: LOAD TEST DATA ---
+# Scenario files above this size are memory-mapped rather than read.
+MMAP_MIN_BYTES = 1_000_000
+
+
+@st.cache_data(max_entries=8)
+def _read_scenario(file_path: str, mtime: float) -> List[Dict[str, Any]]:
+    """Read and parse a scenario file.
+
+    `mtime` is only part of the cache key, so editing the file invalidates the
+    cached copy. `st.cache_data` hands each caller a fresh copy, so callers may
+    mutate the returned list.
+    """
+    with open(file_path, "rb") as file_handle:
+        if os.fstat(file_handle.fileno()).st_size <= MMAP_MIN_BYTES:
+            return orjson.loads(file_handle.read())
+
+        # Large logs: let the kernel page the file in and parse it in place
+        # instead of copying it into a bytes object first.
+        with mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return orjson.loads(view)
+            finally:
+                # The mapping cannot close while a view still exports it.
+                view.release()
+
+
 def load_test_scenario(filename: str) -> None:
     """Load a JSON log and initialize Streamlit session state for testing."""
     file_path = os.path.join(root_dir, "tests", "data", filename)
 
     try:
-        with open(file_path, "r", encoding="utf-8") as file_handle:
-            data = json.load(file_handle)
+        data = _read_scenario(file_path, os.path.getmtime(file_path))
 
         # Reset state
-        st.session_state.messages = []
-        st.session_state.session_summary = None
         st.session_state.last_summary_index = 0
+        set_messages([])
+        st.session_state.session_summary = None
         st.session_state.pending_options = []
 
         # Test scenario routing
         if filename == "long_session.json":
             # [Test Memory] Load the full history to trigger summarization.
-            st.session_state.messages = data
+            set_messages(data)
             st.session_state.test_prompt = None
             st.toast(f"Loaded {len(data)} messages. Checking memory...", icon="💾")
         else:
@@ -100,39 +322,38 @@ def load_test_scenario(filename: str) -> None:
                 history = data[:-1]
                 active_prompt = data[-1]["content"]
 
-                st.session_state.messages = history
+                set_messages(history)
                 st.session_state.test_prompt = active_prompt
 
                 # 2) Memory hydration from history (context.json only)
                 if filename == "context.json":
                     with st.spinner("🧠 Hydrating memory from history..."):
-                        for msg in history:
-                            if msg["role"] == "user":
-                                analysis = st.session_state.query_pipeline.analyze_query(
-                                    msg["content"],
-                                    [],
-                                    st.session_state.session_summary,
-                                )
-                                if analysis.new_user_facts or analysis.new_user_preferences:
-                                    if not st.session_state.session_summary:
-                                        st.session_state.session_summary = SessionSummary(
-                                            user_profile=UserProfile(),
-                                            key_facts=[],
-                                            decisions=[],
-                                            open_questions=[],
-                                            todos=[],
-                                            message_range_summarized=MessageRange(
-                                                start_index=0,
-                                                end_index=0,
-                                            ),
-                                        )
-                                    mem = st.session_state.session_summary
-                                    mem.key_facts.extend(analysis.new_user_facts)
-                                    mem.user_profile.constraints.extend(
-                                        analysis.new_user_preferences
+                        # Fold the extracted signals into memory in message order.
+                        analyses = _hydrate_analyses(
+                            [msg["content"] for msg in history if msg["role"] == "user"]
+                        )
+                        for analysis in analyses:
+                            if analysis.new_user_facts or analysis.new_user_preferences:
+                                if not st.session_state.session_summary:
+                                    st.session_state.session_summary = SessionSummary(
+                                        user_profile=UserProfile(),
+                                        key_facts=[],
+                                        decisions=[],
+                                        open_questions=[],
+                                        todos=[],
+                                        message_range_summarized=MessageRange(
+                                            start_index=0,
+                                            end_index=0,
+                                        ),
                                     )
+                                mem = st.session_state.session_summary
+                                mem.add_key_facts(analysis.new_user_facts)
+                                mem.user_profile.add_constraints(
+                                    analysis.new_user_preferences
+                                )
+                                mem.mark_modified()
             else:
-                st.session_state.messages = data
+                set_messages(data)
 
             st.toast(f"Scenario '{filename}' loaded!", icon="🧪")
 
@@ -154,8 +375,8 @@ with st.sidebar:
     st.session_state.memory_manager.threshold = threshold
 
     # 2) Token usage
-    active_msgs = st.session_state.messages[st.session_state.last_summary_index :]
-    curr_tokens = count_messages_tokens(active_msgs)
+    # Running total kept by the memory manager; no tokenization on rerun.
+    curr_tokens = st.session_state.memory_manager.buffer_tokens
     pct = min(curr_tokens / threshold, 1.0) if threshold > 0 else 1.0
     st.caption(f"Buffer Usage: {curr_tokens}/{threshold} tokens")
     st.progress(pct)
@@ -195,16 +416,15 @@ with st.sidebar:
                 st.markdown(f"- {fact}")
 
         with st.expander("JSON Raw"):
-            st.json(st.session_state.session_summary.model_dump())
+            st.json(session_summary_dict())
     else:
         st.info("Memory is empty.")
 
     if st.button("🗑️ Reset Brain"):
         st.session_state.clear()
 
-        # Remove persisted memory file if present.
-        if os.path.exists(MEMORY_PATH):
-            os.remove(MEMORY_PATH)
+        # Remove persisted memory after any queued writes, so none recreate it.
+        get_memory_writer().submit(clear_persisted_memory, get_persisted_memory()).result()
 
         st.rerun()
 
@@ -255,11 +475,16 @@ if prompt:
 
     # B) [Flow 2] Query pipeline
     with st.status("🧠 Thinking...", expanded=True) as status:
-        analysis = st.session_state.query_pipeline.analyze_query(
+        # Analysis and the draft answer come back from a single request.
+        turn = query_pipeline.analyze_and_respond(
             prompt,
-            st.session_state.messages[-5:],
+            list(st.session_state.recent_context),
             st.session_state.session_summary,
+            chat_generator.get_system_prompt(st.session_state.session_summary),
+            recent_history_json(),
         )
+        analysis = turn.analysis
+        draft_response = turn.response or None
 
         # C) Update memory (fast path)
         if analysis.new_user_facts or analysis.new_user_preferences:
@@ -273,8 +498,11 @@ if prompt:
                     message_range_summarized=MessageRange(start_index=0, end_index=0),
                 )
             mem = st.session_state.session_summary
-            mem.key_facts.extend(analysis.new_user_facts)
-            mem.user_profile.constraints.extend(analysis.new_user_preferences)
+            mem.add_key_facts(analysis.new_user_facts)
+            mem.user_profile.add_constraints(analysis.new_user_preferences)
+            mem.mark_modified()
+            # Write the extracted signals back while the response is generated.
+            submit_memory_snapshot()
 
         # D) Handle ambiguity
         if analysis.is_ambiguous:
@@ -287,14 +515,14 @@ if prompt:
 
             if analysis.clarification_options:
                 st.session_state.pending_options = analysis.clarification_options
-                st.session_state.messages.append(
+                append_message(
                     {
                         "role": "user",
                         "content": prompt,
                         "debug_info": analysis.model_dump(),
                     }
                 )
-                st.session_state.messages.append(
+                append_message(
                     {
                         "role": "assistant",
                         "content": analysis.clarifying_question or "Please clarify.",
@@ -309,7 +537,7 @@ if prompt:
     # E) [Flow 3] Generate (only if not blocked by clarifying options)
     if not (analysis.is_ambiguous and analysis.clarification_options):
         # Persist the user query in history.
-        st.session_state.messages.append(
+        append_message(
             {"role": "user", "content": prompt, "debug_info": analysis.model_dump()}
         )
 
@@ -320,53 +548,41 @@ if prompt:
         )
 
         with st.chat_message("assistant"):
-            # 1) Placeholder to support incremental rendering.
-            message_placeholder = st.empty()
-
-            # 2) Spinner while waiting for the backend call.
-            with st.spinner("Thinking..."):
-                full_response = st.session_state.chat_generator.generate_response(
-                    final_query,
-                    st.session_state.messages[-5:],
-                    st.session_state.session_summary,
+            if draft_response is not None:
+                # 1) The single-pass draft is already complete; render it at once.
+                st.markdown(draft_response)
+                full_response = draft_response
+            else:
+                # 2) Otherwise stream a fresh answer token-by-token as it arrives.
+                full_response = st.write_stream(
+                    chat_generator.stream_response(
+                        final_query,
+                        list(st.session_state.recent_context),
+                        st.session_state.session_summary,
+                    )
                 )
 
-            # 3) Typing effect
-            displayed_text = ""
-            chunks = full_response.split(" ")
-
-            for i, chunk in enumerate(chunks):
-                displayed_text += f"{chunk} "
-
-                if i < len(chunks) - 1:
-                    message_placeholder.markdown(displayed_text + "|")
-                else:
-                    message_placeholder.markdown(displayed_text)
-
-                time.sleep(0.02)
-
-            # Ensure the final message is rendered without the cursor.
-            message_placeholder.markdown(full_response)
-
         # Persist assistant response.
-        st.session_state.messages.append({"role": "assistant", "content": full_response})
+        append_message({"role": "assistant", "content": full_response})
 
         st.rerun()
 
 # F) [Flow 1] Memory consolidation (run after appending new messages)
-active_buffer = st.session_state.messages[st.session_state.last_summary_index :]
-if st.session_state.memory_manager.should_summarize(active_buffer):
+if st.session_state.memory_manager.should_summarize():
     with st.sidebar:
         with st.spinner("💾 Consolidating Memory..."):
+            active_buffer = st.session_state.memory_manager.buffered_messages
             new_summary = st.session_state.memory_manager.summarize_messages(
                 active_buffer,
                 st.session_state.session_summary,
             )
             st.session_state.session_summary = new_summary
             st.session_state.last_summary_index = len(st.session_state.messages)
+            st.session_state.memory_manager.drop_front(len(active_buffer))
 
-            # Persist to disk.
-            save_json(new_summary.model_dump(), MEMORY_PATH)
+            # Persist only the changed fields, in the background so the rerun is
+            # not blocked on I/O.
+            submit_memory_snapshot()
 
             st.toast("Memory Consolidated & Saved!", icon="💾")
 
@@ -11,6 +11,7 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     MODEL_NAME: str = "gpt-4o"
     MEMORY_THRESHOLD_TOKENS: int = 200
+    MAX_CONCURRENCY: int = 16  # Max in-flight async LLM requests per process
 
     model_config = SettingsConfigDict(
         env_file=".env",  # Target environment file
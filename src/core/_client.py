@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+
+from openai import AsyncOpenAI, OpenAI
+
+from src.config import settings
+from src.core.http import get_shared_client
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def get_client() -> OpenAI:
+    """Return the process-wide sync client.
+
+    Sharing one client shares its connection pool, so every flow reuses
+    kept-alive TCP/TLS connections instead of opening its own.
+    """
+    return OpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+@lru_cache(maxsize=1)
+def get_async_client() -> AsyncOpenAI:
+    """Return the process-wide async client on the shared HTTP/2 connection pool.
+
+    Built on first use, so sync-only callers never create the async pool.
+    """
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=get_shared_client())
+
+
+# Caps in-flight async LLM requests across all flows and sessions, providing
+# backpressure against OpenAI rate limits. Async work runs on the shared loop
+# (see `src.core.http.run_async`), so one semaphore covers every caller.
+LLM_SEMAPHORE = asyncio.Semaphore(settings.MAX_CONCURRENCY)
+
+
+def log_cache_usage(flow: str, usage: Optional[Any]) -> None:
+    """Log how much of a request's prompt was served from OpenAI's prefix cache.
+
+    Prompt caching applies automatically to exact prefixes of 1024+ tokens, so
+    each flow keeps its static instructions first and its volatile context last.
+
+    Args:
+        flow: Short label for the calling flow (e.g., "query_pipeline").
+        usage: The `usage` object of a completion or final stream chunk.
+    """
+    if usage is None:
+        return
+
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None) or 0
+    logger.info(
+        "Prompt cache [%s]: %s/%s prompt tokens cached",
+        flow,
+        cached_tokens,
+        usage.prompt_tokens,
+    )
@@ -0,0 +1,76 @@
+import asyncio
+import atexit
+import threading
+from functools import lru_cache
+from typing import Any, Coroutine, Optional, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+# Seconds to wait for pooled connections to close at interpreter exit.
+SHUTDOWN_TIMEOUT = 5.0
+
+# Pooled connections are bound to the event loop that opened them, so all
+# async work runs on a single long-lived loop instead of a fresh
+# `asyncio.run` loop per call. The loop and its thread start on first use, so
+# sync-only callers (e.g., the CLI) never pay for them.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_shared_client() -> httpx.AsyncClient:
+    """Return the pooled HTTP/2 client shared by every async OpenAI client.
+
+    TCP/TLS handshakes are paid once and connections stay warm across requests.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+    )
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared event loop, starting its thread on first use."""
+    global _loop
+
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever,
+                name="shared-http-loop",
+                daemon=True,
+            ).start()
+
+    return _loop
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the shared event loop and block until it completes.
+
+    This is the synchronous entry point for callers (e.g., Streamlit scripts)
+    that need to await coroutines using `get_shared_client()`.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+def _shutdown() -> None:
+    """Close pooled connections and stop the shared loop at interpreter exit."""
+    if _loop is None:
+        return
+
+    if get_shared_client.cache_info().currsize:
+        future = asyncio.run_coroutine_threadsafe(get_shared_client().aclose(), _loop)
+        try:
+            future.result(timeout=SHUTDOWN_TIMEOUT)
+        except Exception:
+            # A stuck loop must not block interpreter exit.
+            future.cancel()
+
+    _loop.call_soon_threadsafe(_loop.stop)
+
+
+atexit.register(_shutdown)
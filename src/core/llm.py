@@ -1,10 +1,29 @@
-from typing import Any, Dict, List, Optional
-
-from openai import OpenAI
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from src.config import settings
+from src.core._client import get_client, log_cache_usage
 from src.schemas.memory import SessionSummary
 
+# Standard chat message fields forwarded to the API; anything else (e.g.,
+# debug_info) is internal metadata.
+_ALLOWED_KEYS = ("role", "content", "name")
+
+# Number of recently built system prompts kept per generator.
+PROMPT_CACHE_SIZE = 4
+
+# Static preamble shared by every request. It must stay byte-identical and come
+# first so OpenAI's automatic prompt caching can reuse the prefix across turns;
+# all per-user memory is appended after it.
+BASE_PROMPT = (
+    "You are a helpful and intelligent AI Assistant.\n"
+    "Answer the user's questions clearly and accurately.\n"
+)
+
+# Higher temperature for more natural creativity.
+GENERATION_TEMPERATURE = 0.7
+
 
 class ChatGenerator:
     """Flow 3: Response generation.
@@ -14,23 +33,56 @@ class ChatGenerator:
     """
 
     def __init__(self, model_name: str = settings.MODEL_NAME) -> None:
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = get_client()
         self.model_name = model_name
+        # (id, end_index, version) -> (summary, prompt). The summary reference
+        # pins the object so its id cannot be reused while the entry is cached.
+        self._prompt_cache: "OrderedDict[Tuple[int, int, int], Tuple[SessionSummary, str]]" = (
+            OrderedDict()
+        )
+        # The generator is shared across Streamlit sessions (script threads).
+        self._prompt_cache_lock = threading.Lock()
+
+    def get_system_prompt(self, session_memory: Optional[SessionSummary]) -> str:
+        """Return the system prompt, reusing it while the memory is unchanged.
+
+        Memory changes only on consolidation (new summary object or range) or
+        instant extraction (version bump), so most turns hit the cache.
+        """
+        if not session_memory:
+            return self._build_system_prompt(session_memory)
+
+        key = (
+            id(session_memory),
+            session_memory.message_range_summarized.end_index,
+            session_memory.version,
+        )
+        with self._prompt_cache_lock:
+            cached = self._prompt_cache.get(key)
+            if cached is not None and cached[0] is session_memory:
+                self._prompt_cache.move_to_end(key)
+                return cached[1]
+
+        prompt = self._build_system_prompt(session_memory)
+
+        with self._prompt_cache_lock:
+            self._prompt_cache[key] = (session_memory, prompt)
+            self._prompt_cache.move_to_end(key)
+            if len(self._prompt_cache) > PROMPT_CACHE_SIZE:
+                self._prompt_cache.popitem(last=False)
+
+        return prompt
 
     def _build_system_prompt(self, session_memory: Optional[SessionSummary]) -> str:
         """Build a system prompt that optionally includes long-term memory.
 
         Memory is injected selectively to reduce token usage while preserving the
         most actionable personalization signals (constraints, preferences, and
-        stable facts).
+        stable facts). Sections are emitted in a fixed order after the static
+        `BASE_PROMPT`, so identical memory always yields identical bytes.
         """
-        base_prompt = (
-            "You are a helpful and intelligent AI Assistant.\n"
-            "Answer the user's questions clearly and accurately.\n"
-        )
-
         if not session_memory:
-            return base_prompt
+            return BASE_PROMPT
 
         # Inject memory into the system prompt (context injection).
         # Only include high-signal fields to keep the prompt compact.
@@ -38,29 +90,56 @@ class ChatGenerator:
 
         # 1) User profile (who they are)
         if session_memory.user_profile:
-            profile_text = "\n=== USER PROFILE (Remember this) ===\n"
+            profile_parts = ["\n=== USER PROFILE (Remember this) ===\n"]
 
             if session_memory.user_profile.constraints:
-                profile_text += "CONSTRAINTS (Must Follow):\n"
-                for constraint in session_memory.user_profile.constraints:
-                    profile_text += f"- {constraint}\n"
+                profile_parts.append("CONSTRAINTS (Must Follow):\n")
+                profile_parts.extend(
+                    f"- {constraint}\n" for constraint in session_memory.user_profile.constraints
+                )
 
             if session_memory.user_profile.prefs:
-                profile_text += "PREFERENCES:\n"
-                for preference in session_memory.user_profile.prefs:
-                    profile_text += f"- {preference}\n"
+                profile_parts.append("PREFERENCES:\n")
+                profile_parts.extend(
+                    f"- {preference}\n" for preference in session_memory.user_profile.prefs
+                )
 
-            context_blocks.append(profile_text)
+            context_blocks.append("".join(profile_parts))
 
         # 2) Key facts (what we know)
         if session_memory.key_facts:
             facts_text = "\n=== KEY FACTS ===\n" + "\n".join(
-                [f"- {fact}" for fact in session_memory.key_facts]
+                f"- {fact}" for fact in session_memory.key_facts
             )
             context_blocks.append(facts_text)
 
-        # Combine prompt sections.
-        return base_prompt + "\n".join(context_blocks)
+        if not context_blocks:
+            return BASE_PROMPT
+
+        # Combine prompt sections: stable prefix first, volatile memory last.
+        return "".join((BASE_PROMPT, "\n".join(context_blocks)))
+
+    def _build_messages(
+        self,
+        user_query: str,
+        context_messages: List[Dict[str, Any]],
+        session_memory: Optional[SessionSummary],
+    ) -> List[Dict[str, Any]]:
+        """Assemble the chat payload: system prompt, recent context, and query."""
+        # 1) Build the personalized system prompt.
+        system_prompt = self.get_system_prompt(session_memory)
+
+        # 2) Assemble messages payload.
+        messages: List[Dict[str, Any]] = [{"role": "system", "content": system_prompt}]
+
+        # Add recent context while excluding non-standard fields (e.g., debug_info).
+        for msg in context_messages:
+            messages.append({key: msg[key] for key in _ALLOWED_KEYS if key in msg})
+
+        # Add the current query.
+        messages.append({"role": "user", "content": user_query})
+
+        return messages
 
     def generate_response(
         self,
@@ -75,25 +154,43 @@ class ChatGenerator:
             context_messages: Recent short-term conversation history.
             session_memory: Consolidated long-term memory for personalization.
         """
-        # 1) Build the personalized system prompt.
-        system_prompt = self._build_system_prompt(session_memory)
+        # 1) Build the personalized prompt and messages payload.
+        messages = self._build_messages(user_query, context_messages, session_memory)
 
-        # 2) Assemble messages payload.
-        messages: List[Dict[str, Any]] = [{"role": "system", "content": system_prompt}]
+        # 2) Call the LLM.
+        response = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            temperature=GENERATION_TEMPERATURE,
+        )
+        log_cache_usage("chat_generator", response.usage)
 
-        # Add recent context while excluding non-standard fields (e.g., debug_info).
-        for msg in context_messages:
-            clean_msg = {k: v for k, v in msg.items() if k in ["role", "content", "name"]}
-            messages.append(clean_msg)
+        return response.choices[0].message.content
 
-        # Add the current query.
-        messages.append({"role": "user", "content": user_query})
+    def stream_response(
+        self,
+        user_query: str,
+        context_messages: List[Dict[str, Any]],
+        session_memory: Optional[SessionSummary] = None,
+    ) -> Iterator[str]:
+        """Stream the assistant response as text deltas.
 
-        # 3) Call the LLM.
-        response = self.client.chat.completions.create(
+        Takes the same arguments as `generate_response` but yields content as
+        soon as the model emits it, so callers can render incrementally.
+        """
+        messages = self._build_messages(user_query, context_messages, session_memory)
+
+        stream = self.client.chat.completions.create(
             model=self.model_name,
             messages=messages,
-            temperature=0.7,  # Higher temperature for more natural creativity.
+            temperature=GENERATION_TEMPERATURE,
+            stream=True,
+            # The final chunk carries usage (with no choices) for cache monitoring.
+            stream_options={"include_usage": True},
         )
 
-        return response.choices[0].message.content
\ No newline at end of file
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if chunk.usage is not None:
+                log_cache_usage("chat_generator", chunk.usage)
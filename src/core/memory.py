@@ -1,17 +1,64 @@
-import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Union
 
-from openai import OpenAI
+import orjson
 
 from src.config import settings
 from src.constants import MEMORY_MANAGER_PROMPT
+from src.core._client import get_client, log_cache_usage
 from src.schemas.memory import MessageRange, SessionSummary, SessionSummaryContent
-from src.utils.tokenizer import count_messages_tokens
+from src.utils.tokenizer import (
+    REPLY_PRIMING_TOKENS,
+    count_message_tokens,
+    count_messages_tokens,
+    max_messages_tokens,
+)
 
 logger = logging.getLogger(__name__)
 
 
+class MessageBuffer:
+    """Message window that keeps a running ChatML token total.
+
+    Each message is tokenized once on `append`, and its count is remembered so
+    `drop_prefix` can subtract it later. Checking the buffer size is therefore
+    O(1) instead of a rescan of every message.
+    """
+
+    def __init__(
+        self,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        model_name: str = settings.MODEL_NAME,
+    ) -> None:
+        self.model_name = model_name
+        self.messages: List[Dict[str, Any]] = []
+        self._token_counts: List[int] = []
+        # Sum of per-message tokens, excluding the once-per-prompt reply priming.
+        self.total_tokens = 0
+
+        for message in messages or []:
+            self.append(message)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.messages)
+
+    def append(self, message: Dict[str, Any]) -> None:
+        """Add a message and its token count to the buffer."""
+        token_count = count_message_tokens(message, self.model_name)
+        self.messages.append(message)
+        self._token_counts.append(token_count)
+        self.total_tokens += token_count
+
+    def drop_prefix(self, count: int) -> None:
+        """Remove the oldest `count` messages (e.g., after summarizing them)."""
+        self.total_tokens -= sum(self._token_counts[:count])
+        del self.messages[:count]
+        del self._token_counts[:count]
+
+
 class MemoryManager:
     """Flow 1: Memory consolidation.
 
@@ -24,67 +71,134 @@ class MemoryManager:
         model_name: str = settings.MODEL_NAME,
         threshold: int = settings.MEMORY_THRESHOLD_TOKENS,
     ) -> None:
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = get_client()
         self.model_name = model_name
         self.threshold = threshold
         self.system_prompt = MEMORY_MANAGER_PROMPT
+        # Unsummarized messages with a running token total (see `append_message`).
+        self._buffer = MessageBuffer(model_name=model_name)
+
+    @property
+    def buffered_messages(self) -> List[Dict[str, Any]]:
+        """Messages appended since the last `drop_front` that covered them."""
+        return self._buffer.messages
+
+    @property
+    def buffer_tokens(self) -> int:
+        """ChatML token count of the buffered messages, including reply priming."""
+        return self._buffer.total_tokens + REPLY_PRIMING_TOKENS
+
+    def reset_buffer(self, messages: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Replace the buffer, e.g., after loading history or copying the manager."""
+        self._buffer = MessageBuffer(messages, model_name=self.model_name)
 
-    def should_summarize(self, messages: List[Dict[str, Any]]) -> bool:
-        """Return True when the message buffer exceeds the configured token threshold."""
-        total_tokens = count_messages_tokens(messages, model_name=self.model_name)
+    def append_message(self, message: Dict[str, Any]) -> None:
+        """Add a message to the buffer, tokenizing it once."""
+        self._buffer.append(message)
+
+    def drop_front(self, count: int) -> None:
+        """Remove the oldest `count` buffered messages (e.g., once summarized)."""
+        self._buffer.drop_prefix(count)
+
+    def should_summarize(
+        self,
+        messages: Optional[Union[List[Dict[str, Any]], MessageBuffer]] = None,
+    ) -> bool:
+        """Return True when the message buffer exceeds the configured token threshold.
+
+        Without arguments, checks the manager's own buffer in O(1).
+        """
+        if messages is None:
+            messages = self._buffer
+
+        if isinstance(messages, MessageBuffer):
+            # Running total: no tokenization needed.
+            total_tokens = messages.total_tokens + REPLY_PRIMING_TOKENS
+        elif max_messages_tokens(messages) <= self.threshold:
+            # Skip tokenization entirely while even the worst case fits the threshold.
+            return False
+        else:
+            total_tokens = count_messages_tokens(messages, model_name=self.model_name)
 
         # Log for debugging visibility.
         logger.info("Buffer Status: %s/%s tokens", total_tokens, self.threshold)
 
         return total_tokens > self.threshold
 
-    def summarize_messages(
+    def _build_messages(
         self,
         messages: List[Dict],
-        previous_summary: Optional[SessionSummary] = None,
-    ) -> SessionSummary:
-        """Merge prior summary content with recent messages into a new summary."""
+        previous_summary: Optional[SessionSummary],
+    ) -> List[Dict[str, str]]:
+        """Build the consolidation request from the prior profile and new messages."""
         # 1) Prepare context.
         current_profile_context = "None"
-        if previous_summary:
+        # An empty profile carries no information, so keep the literal "None"
+        # instead of serializing it into billed prompt tokens.
+        if previous_summary and (
+            previous_summary.user_profile.prefs or previous_summary.user_profile.constraints
+        ):
             # Provide only content fields to the model; metadata is computed in Python.
-            current_profile_context = previous_summary.user_profile.model_dump_json()
+            current_profile_context = previous_summary.memoize(
+                "profile_json",
+                previous_summary.user_profile.model_dump_json,
+            )
 
         # 2) Build prompt.
         user_content = (
             "=== CURRENT USER PROFILE (Raw/Accumulated) ===\n"
             f"{current_profile_context}\n\n"
             "=== RECENT MESSAGES TO CONSOLIDATE ===\n"
-            f"{json.dumps(messages, ensure_ascii=False)}\n\n"
+            f"{orjson.dumps(messages).decode()}\n\n"
             "TASK: Consolidate profile and summarize session."
         )
 
-        # 3) Call the model.
-        completion = self.client.beta.chat.completions.parse(
-            model=self.model_name,
-            messages=[
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": user_content},
-            ],
-            # Use the content-only schema to prevent hallucination of message indices.
-            response_format=SessionSummaryContent,
-            temperature=0,
-        )
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_content},
+        ]
 
-        ai_content = completion.choices[0].message.parsed
-
-        # 4) Calculate metadata (application responsibility).
+    @staticmethod
+    def _merge_metadata(
+        ai_content: SessionSummaryContent,
+        messages: List[Dict],
+        previous_summary: Optional[SessionSummary],
+    ) -> SessionSummary:
+        """Attach the Python-computed message range to the model's summary content."""
         # Calculate exactly which messages were summarized.
         start_index = (
             previous_summary.message_range_summarized.end_index if previous_summary else 0
         )
         end_index = start_index + len(messages)
 
-        # 5) Merge AI content + Python metadata into the final object.
         return SessionSummary(
             **ai_content.model_dump(),
             message_range_summarized=MessageRange(
                 start_index=start_index,
                 end_index=end_index,
             ),
-        )
\ No newline at end of file
+        )
+
+    def summarize_messages(
+        self,
+        messages: List[Dict],
+        previous_summary: Optional[SessionSummary] = None,
+    ) -> SessionSummary:
+        """Merge prior summary content with recent messages into a new summary."""
+        # 1) Build prompt.
+        request_messages = self._build_messages(messages, previous_summary)
+
+        # 2) Call the model.
+        completion = self.client.beta.chat.completions.parse(
+            model=self.model_name,
+            messages=request_messages,
+            # Use the content-only schema to prevent hallucination of message indices.
+            response_format=SessionSummaryContent,
+            temperature=0,
+        )
+
+        log_cache_usage("memory_manager", completion.usage)
+        ai_content = completion.choices[0].message.parsed
+
+        # 3) Merge AI content + Python metadata (application responsibility).
+        return self._merge_metadata(ai_content, messages, previous_summary)
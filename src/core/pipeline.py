@@ -1,13 +1,44 @@
-import json
-from typing import Any, Dict, List, Optional
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
-from openai import OpenAI
+import orjson
 
 from src.config import settings
-from src.constants import QUERY_PIPELINE_PROMPT
-from src.schemas.chat import QueryAnalysis
+from src.constants import COMBINED_TURN_PROMPT, QUERY_PIPELINE_PROMPT
+from src.core._client import LLM_SEMAPHORE, get_async_client, get_client, log_cache_usage
+from src.schemas.chat import AmbiguityType, CombinedTurnOutput, QueryAnalysis
 from src.schemas.memory import SessionSummary
 
+# Maximum number of memoized analyses kept per pipeline instance.
+ANALYSIS_CACHE_SIZE = 512
+
+AnalysisCacheKey = Tuple[str, str, str]
+
+# Queries at least this long are always sent to the analyst.
+TRIVIAL_QUERY_MAX_CHARS = 120
+
+# Words that make a query depend on earlier context (references, definite
+# articles such as "Fix the bug", relative time, and elliptical follow-ups
+# such as "Why?", "Continue", or "How about Go?").
+_CONTEXT_REF_RE = re.compile(
+    r"\b(it|they|them|this|that|these|those|there|then|he|she|his|her|him|the"
+    r"|next|last|previous|tomorrow|yesterday|again|same|other"
+    r"|why|how about|what about|continue|more|and|also|else)\b",
+    re.I,
+)
+# First-person statements may carry facts or preferences worth extracting.
+_FIRST_PERSON_RE = re.compile(r"\b(i|me|my|mine|myself|we|us|our)\b", re.I)
+# Imperative instructions and preference cues (e.g., "Be concise", "Never use
+# Java", "Always answer in Python") may carry constraints worth extracting.
+_DIRECTIVE_RE = re.compile(
+    r"\b(always|never|don'?t|do not|prefer|avoid|only|be|use|answer|respond|reply"
+    r"|speak|write|call|stop|keep|please|like|love|hate)\b",
+    re.I,
+)
+
 
 class QueryPipeline:
     """Flow 2: Query understanding and instant memory extraction.
@@ -17,21 +48,140 @@ class QueryPipeline:
     """
 
     def __init__(self, model_name: str = settings.MODEL_NAME) -> None:
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = get_client()
         self.model_name = model_name
+        self._analysis_cache: "OrderedDict[AnalysisCacheKey, QueryAnalysis]" = OrderedDict()
+        # Shared by every session's script thread and the `run_async` loop thread.
+        self._analysis_cache_lock = threading.Lock()
+
+    @staticmethod
+    def serialize_history(recent_messages: List[Dict[str, Any]]) -> str:
+        """Serialize the short-term context window exactly as the prompt embeds it.
+
+        Callers that analyze several queries against the same window can
+        serialize it once and pass the result as `history_json`.
+        """
+        return orjson.dumps(recent_messages).decode()
+
+    @staticmethod
+    def _cache_key(
+        current_query: str,
+        history_json: str,
+        session_memory: Optional[SessionSummary],
+    ) -> AnalysisCacheKey:
+        """Build a hashable key from the normalized query and its context."""
+        history_hash = hashlib.blake2b(history_json.encode("utf-8")).hexdigest()[:16]
+        memory_json = (
+            session_memory.memoize("json", session_memory.model_dump_json)
+            if session_memory
+            else ""
+        )
+        return (current_query.strip().lower(), history_hash, memory_json)
+
+    def _cache_lookup(self, key: AnalysisCacheKey) -> Optional[QueryAnalysis]:
+        """Return a memoized analysis and mark it as recently used."""
+        with self._analysis_cache_lock:
+            analysis = self._analysis_cache.get(key)
+            if analysis is not None:
+                self._analysis_cache.move_to_end(key)
+            return analysis
+
+    def _cache_store(self, key: AnalysisCacheKey, analysis: QueryAnalysis) -> None:
+        """Memoize an analysis, evicting the least recently used entry when full.
+
+        Ambiguous results are never cached so the user is always re-asked for
+        clarification instead of replaying a stale choice.
+        """
+        if analysis.is_ambiguous:
+            return
+
+        with self._analysis_cache_lock:
+            self._analysis_cache[key] = analysis
+            self._analysis_cache.move_to_end(key)
+            if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                self._analysis_cache.popitem(last=False)
+
+    @staticmethod
+    def _serialize_memory(session_memory: SessionSummary) -> str:
+        """Serialize the memory fields relevant to query analysis.
+
+        Only the profile is dumped; walking the whole summary (facts, decisions,
+        todos, ...) would be discarded work.
+        """
+        relevant_memory = {
+            "user_profile": session_memory.user_profile.model_dump(),
+            # SessionSummary keeps no history of past summaries, so this is
+            # always empty; the key is kept so the analyst input is unchanged.
+            "recent_session_summaries": [],
+        }
+
+        return orjson.dumps(relevant_memory).decode()
+
+    @staticmethod
+    def _skip_analysis(current_query: str) -> Optional[QueryAnalysis]:
+        """Return a clear analysis for short, self-contained queries, else None.
+
+        Such queries (e.g., "what's 2+2") contain no references to resolve and no
+        first-person statements or directives to extract, so the analyst call
+        can be skipped. The cues are English-only, so any non-ASCII query (e.g.,
+        Vietnamese) is always analyzed.
+        """
+        if (
+            len(current_query) >= TRIVIAL_QUERY_MAX_CHARS
+            or not current_query.isascii()
+            or _CONTEXT_REF_RE.search(current_query)
+            or _FIRST_PERSON_RE.search(current_query)
+            or _DIRECTIVE_RE.search(current_query)
+        ):
+            return None
+
+        return QueryAnalysis(
+            is_ambiguous=False,
+            ambiguity_reason=AmbiguityType.NONE,
+            rewritten_query=None,
+        )
+
+    def _build_user_input(
+        self,
+        current_query: str,
+        history_json: str,
+        session_memory: Optional[SessionSummary],
+    ) -> str:
+        """Format memory, recent history, and the query into the analyst input."""
+        memory_context_str = "None"
+        if session_memory:
+            memory_context_str = session_memory.memoize(
+                "analysis_context",
+                lambda: self._serialize_memory(session_memory),
+            )
+
+        return (
+            "=== SESSION MEMORY (What we know) ===\n"
+            f"{memory_context_str}\n\n"
+            "=== RECENT CONVERSATION HISTORY ===\n"
+            f"{history_json}\n\n"
+            "=== CURRENT USER QUERY ===\n"
+            f"'{current_query}'"
+        )
 
     def analyze_query(
         self,
         current_query: str,
         recent_messages: List[Dict[str, Any]],
         session_memory: Optional[SessionSummary],
+        history_json: Optional[str] = None,
     ) -> QueryAnalysis:
         """Analyze the user query using the LLM.
 
+        Short, self-contained queries are answered locally as clear (see
+        `_skip_analysis`) without a request.
+
         Args:
             current_query: The raw user input.
             recent_messages: The short-term context window (e.g., last N messages).
             session_memory: The long-term consolidated memory (user profile + facts).
+            history_json: Optional pre-serialized `recent_messages` (see
+                `serialize_history`); computed on demand when omitted.
 
         Returns:
             QueryAnalysis: Structured output indicating ambiguity and extracted signals.
@@ -39,26 +189,19 @@ class QueryPipeline:
         Raises:
             Exception: Re-raises any exception to preserve existing error behavior.
         """
-        memory_context_str = "None"
-        if session_memory:
-            memory_dict = session_memory.model_dump()
+        skipped = self._skip_analysis(current_query)
+        if skipped is not None:
+            return skipped
 
-            relevant_memory = {
-                "user_profile": memory_dict.get("user_profile"),
-                "recent_session_summaries": memory_dict.get("session_summaries", [])[-10:]
-            }
+        if history_json is None:
+            history_json = self.serialize_history(recent_messages)
 
-            memory_context_str = json.dumps(relevant_memory, ensure_ascii=False)
+        cache_key = self._cache_key(current_query, history_json, session_memory)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            return cached
 
-
-        user_input = (
-            "=== SESSION MEMORY (What we know) ===\n"
-            f"{memory_context_str}\n\n"
-            "=== RECENT CONVERSATION HISTORY ===\n"
-            f"{json.dumps(recent_messages, ensure_ascii=False)}\n\n"
-            "=== CURRENT USER QUERY ===\n"
-            f"'{current_query}'"
-        )
+        user_input = self._build_user_input(current_query, history_json, session_memory)
 
         try:
             completion = self.client.beta.chat.completions.parse(
@@ -70,10 +213,118 @@ class QueryPipeline:
                 response_format=QueryAnalysis,
                 temperature=0,
             )
-            return completion.choices[0].message.parsed
+            log_cache_usage("query_pipeline", completion.usage)
+            analysis = completion.choices[0].message.parsed
+            self._cache_store(cache_key, analysis)
+            return analysis
 
         except Exception as exc:
             # REVIEW NOTE (not changed): Uses print instead of logging to preserve
             # current runtime behavior and output destination.
             print(f"Error in QueryPipeline: {exc}")
-            raise exc
\ No newline at end of file
+            raise exc
+
+    async def aanalyze_query(
+        self,
+        current_query: str,
+        recent_messages: List[Dict[str, Any]],
+        session_memory: Optional[SessionSummary],
+        history_json: Optional[str] = None,
+    ) -> QueryAnalysis:
+        """Async variant of `analyze_query` for issuing analyses concurrently.
+
+        Accepts the same arguments and returns the same structured output; the
+        request is sent through `AsyncOpenAI` so callers can await many analyses
+        at once (e.g., via `asyncio.gather`).
+        """
+        skipped = self._skip_analysis(current_query)
+        if skipped is not None:
+            return skipped
+
+        if history_json is None:
+            history_json = self.serialize_history(recent_messages)
+
+        cache_key = self._cache_key(current_query, history_json, session_memory)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            return cached
+
+        user_input = self._build_user_input(current_query, history_json, session_memory)
+
+        try:
+            async with LLM_SEMAPHORE:
+                completion = await get_async_client().beta.chat.completions.parse(
+                    model=self.model_name,
+                    messages=[
+                        {"role": "system", "content": QUERY_PIPELINE_PROMPT},
+                        {"role": "user", "content": user_input},
+                    ],
+                    response_format=QueryAnalysis,
+                    temperature=0,
+                )
+            log_cache_usage("query_pipeline", completion.usage)
+            analysis = completion.choices[0].message.parsed
+            self._cache_store(cache_key, analysis)
+            return analysis
+
+        except Exception as exc:
+            print(f"Error in QueryPipeline: {exc}")
+            raise exc
+
+    def analyze_and_respond(
+        self,
+        current_query: str,
+        recent_messages: List[Dict[str, Any]],
+        session_memory: Optional[SessionSummary],
+        response_prompt: str,
+        history_json: Optional[str] = None,
+    ) -> CombinedTurnOutput:
+        """Analyze the query and draft the response in a single LLM request.
+
+        Takes the same arguments as `analyze_query`, plus the generator's system
+        prompt, so the draft sees the same memory (profile, key facts) as
+        `ChatGenerator`. The request runs at temperature 0 like `analyze_query`,
+        because the analysis is persisted and routed on; the draft is therefore
+        greedier than a streamed `ChatGenerator` answer. The response is
+        dropped when the query is ambiguous, so callers can clarify or
+        regenerate from the rewritten query. Trivially clear queries skip the
+        request entirely and come back without a response, so callers generate
+        one themselves.
+
+        Args:
+            response_prompt: `ChatGenerator.get_system_prompt(session_memory)`.
+
+        Raises:
+            Exception: Re-raises any exception to preserve existing error behavior.
+        """
+        skipped = self._skip_analysis(current_query)
+        if skipped is not None:
+            return CombinedTurnOutput(analysis=skipped)
+
+        if history_json is None:
+            history_json = self.serialize_history(recent_messages)
+
+        user_input = self._build_user_input(current_query, history_json, session_memory)
+
+        try:
+            completion = self.client.beta.chat.completions.parse(
+                model=self.model_name,
+                messages=[
+                    # Static instructions first; the memory-bearing generator
+                    # prompt last, keeping the cacheable prefix stable.
+                    {"role": "system", "content": COMBINED_TURN_PROMPT + response_prompt},
+                    {"role": "user", "content": user_input},
+                ],
+                response_format=CombinedTurnOutput,
+                # Deterministic analysis: its facts are persisted to memory.
+                temperature=0,
+            )
+            log_cache_usage("combined_turn", completion.usage)
+            turn = completion.choices[0].message.parsed
+            if turn.analysis.is_ambiguous:
+                turn.response = None
+            return turn
+
+        except Exception as exc:
+            print(f"Error in QueryPipeline: {exc}")
+            raise exc
@@ -71,4 +71,21 @@ class QueryAnalysis(BaseModel):
             "Explicit preferences or constraints stated in this query "
             "(e.g., 'I hate Java')."
         ),
-    )
\ No newline at end of file
+    )
+
+
+class CombinedTurnOutput(BaseModel):
+    """Structured output for a single-pass turn (Flow 2 + Flow 3 in one request).
+
+    Packs the query analysis and the assistant response into one completion so
+    a clear query costs a single round-trip.
+    """
+
+    analysis: QueryAnalysis
+    response: Optional[str] = Field(
+        default=None,
+        description=(
+            "The assistant's answer to the query. Left empty when the query is "
+            "ambiguous."
+        ),
+    )
@@ -1,6 +1,8 @@
-from typing import List
+from typing import Any, Callable, Dict, Iterable, List, Tuple, TypeVar
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
+
+T = TypeVar("T")
 
 
 class UserProfile(BaseModel):
@@ -26,6 +28,20 @@ class UserProfile(BaseModel):
         ),
     )
 
+    @field_validator("constraints", mode="after")
+    @classmethod
+    def _dedupe_constraints(cls, constraints: List[str]) -> List[str]:
+        """Drop repeated constraints while keeping first-seen order."""
+        return list(dict.fromkeys(constraints))
+
+    def add_constraints(self, constraints: Iterable[str]) -> None:
+        """Append constraints in order, skipping ones that are already recorded."""
+        known = set(self.constraints)
+        for constraint in constraints:
+            if constraint not in known:
+                known.add(constraint)
+                self.constraints.append(constraint)
+
 
 class MessageRange(BaseModel):
     """Defines the inclusive range of messages covered by a summary.
@@ -86,4 +102,41 @@ class SessionSummary(SessionSummaryContent):
         description=(
             "The exact range of message indices covered by this summary."
         ),
-    )
\ No newline at end of file
+    )
+
+    # Bumped on in-place mutation so derived views (e.g., cached dumps) can
+    # detect staleness without re-serializing the model.
+    _version: int = PrivateAttr(default=0)
+    # name -> (version, value) for derived values such as serialized views.
+    _memo: Dict[str, Tuple[int, Any]] = PrivateAttr(default_factory=dict)
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter of in-place mutations applied to this summary."""
+        return self._version
+
+    def add_key_facts(self, facts: Iterable[str]) -> None:
+        """Append facts in order, skipping ones that are already recorded."""
+        known = set(self.key_facts)
+        for fact in facts:
+            if fact not in known:
+                known.add(fact)
+                self.key_facts.append(fact)
+
+    def memoize(self, name: str, build: Callable[[], T]) -> T:
+        """Return `build()`, reusing the result until the summary is modified.
+
+        Intended for expensive derived values (e.g., JSON serializations) that
+        are requested repeatedly between mutations.
+        """
+        cached = self._memo.get(name)
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+
+        value = build()
+        self._memo[name] = (self._version, value)
+        return value
+
+    def mark_modified(self) -> None:
+        """Record that list fields were mutated in place."""
+        self._version += 1
@@ -0,0 +1,114 @@
+import re
+from typing import List, Optional
+
+from src.schemas.chat import QueryAnalysis
+
+# Precompiled patterns for explicit, first-person statements. They mirror the
+# "instant extraction" task of the query pipeline for the common phrasings
+# only; anything they miss can still be routed to the LLM by the caller.
+
+# Words that end a captured phrase (conjunctions, prepositions, qualifiers).
+_PHRASE_END = (
+    r"(?=\s+(?:and|but|or|who|which|that|using|with|from|because|due|since|so"
+    r"|when|at|in|on|for|of|to|as|than|over|most|much|more)\b|[,.;!?]|$)"
+)
+# One word of a captured phrase (e.g., "Python", "C++", "C#", "node.js").
+_WORD = r"[\w+#.-]*\w[+#]*"
+
+# Only the lead-in is case-insensitive, so names must be capitalized.
+_NAME_RE = re.compile(r"(?i:\bmy name is\s+)([A-Z][\w'-]*)")
+_ROLE_RE = re.compile(
+    r"\bi(?:\s+am|'m)\s+"
+    # Quantifiers ("a bit tired", "a lot busier") describe states, not roles.
+    r"(an?\s+(?!(?:bit|little|lot|few|tad|kind|sort|bunch|couple)\b)"
+    rf"{_WORD}(?:\s+{_WORD}){{0,3}}?){_PHRASE_END}",
+    re.I,
+)
+_PREFERENCE_RE = re.compile(
+    r"\bi\s+(?:really\s+|absolutely\s+|strongly\s+|just\s+)?"
+    r"(hate|love|like|prefer|dislike|avoid|don't like|do not like|don't use|do not use)"
+    rf"\s+({_WORD}(?:\s+{_WORD}){{0,2}}?){_PHRASE_END}",
+    re.I,
+)
+_PROHIBITION_RE = re.compile(
+    rf"\b(?:don't|do not|never)\s+use\s+({_WORD}(?:\s+{_WORD}){{0,2}}?){_PHRASE_END}",
+    re.I,
+)
+
+# Objects that are function words or pronouns ("I like to ...", "I hate when
+# ...", "don't use it") carry no extractable preference by themselves.
+_NON_OBJECT_WORDS = frozenset(
+    {
+        "a", "an", "the", "to", "when", "how", "what", "if", "it", "its", "it's",
+        "that", "this", "these", "those", "them", "they", "him", "her", "his",
+        "you", "your", "me", "my", "us", "our", "their", "being", "having",
+        "doing", "is", "are", "very", "really", "so", "much", "more", "about",
+        "not", "some", "any",
+    }
+)
+
+# Canonical phrasing for each preference verb, matching the LLM's style
+# (e.g., "Hates Java").
+_PREFERENCE_LABELS = {
+    "hate": "Hates",
+    "love": "Loves",
+    "like": "Likes",
+    "prefer": "Prefers",
+    "dislike": "Dislikes",
+    "avoid": "Avoids",
+    "don't like": "Dislikes",
+    "do not like": "Dislikes",
+    "don't use": "Avoids",
+    "do not use": "Avoids",
+}
+
+
+def _is_non_object(phrase: str) -> bool:
+    """Return True when a captured object starts with a function word or pronoun."""
+    return phrase.split(maxsplit=1)[0].lower() in _NON_OBJECT_WORDS
+
+
+def fast_extract(text: str) -> Optional[QueryAnalysis]:
+    """Extract explicit user facts and preferences with regular expressions.
+
+    This is a cheap, offline stand-in for the LLM's instant extraction. It
+    never flags ambiguity and only recognizes a fixed set of phrasings.
+
+    Returns:
+        A non-ambiguous QueryAnalysis carrying the extracted signals, or None
+        when no pattern matched or a match had no usable object (e.g., "I like
+        to code"), so callers can fall back to the LLM.
+    """
+    facts: List[str] = []
+    preferences: List[str] = []
+
+    for match in _NAME_RE.finditer(text):
+        if match.group(1).lower() in _NON_OBJECT_WORDS:
+            return None
+        facts.append(f"User name is {match.group(1)}")
+
+    for match in _ROLE_RE.finditer(text):
+        facts.append(f"User is {match.group(1).strip()}")
+
+    for match in _PREFERENCE_RE.finditer(text):
+        if _is_non_object(match.group(2)):
+            # Leave phrasings like "I like to code in Python" to the LLM.
+            return None
+        label = _PREFERENCE_LABELS[re.sub(r"\s+", " ", match.group(1).lower())]
+        preferences.append(f"{label} {match.group(2)}")
+
+    for match in _PROHIBITION_RE.finditer(text):
+        if _is_non_object(match.group(1)):
+            return None
+        preference = f"Avoids {match.group(1)}"
+        if preference not in preferences:
+            preferences.append(preference)
+
+    if not facts and not preferences:
+        return None
+
+    return QueryAnalysis(
+        is_ambiguous=False,
+        new_user_facts=facts,
+        new_user_preferences=preferences,
+    )
@@ -1,7 +1,9 @@
-import json
 import logging
+import os
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, List, Optional, Union
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -10,8 +12,10 @@ def save_json(data: Any, file_path: Union[str, Path]) -> None:
     """Persist data to a JSON file in a safe and deterministic manner.
 
     This function ensures that parent directories are created if they do not
-    already exist and writes JSON using UTF-8 encoding to preserve non-ASCII
-    characters (e.g., Vietnamese text).
+    already exist and writes JSON as UTF-8 bytes via `orjson`, which preserves
+    non-ASCII characters (e.g., Vietnamese text) without escaping. The payload
+    goes to a temporary sibling first and is then renamed over the target, so
+    a crash mid-write never leaves a truncated file behind.
 
     Args:
         data: Arbitrary JSON-serializable data to persist.
@@ -21,20 +25,33 @@ def save_json(data: Any, file_path: Union[str, Path]) -> None:
         Exception: Re-raises any exception encountered during file I/O or
             serialization to preserve existing error-handling behavior.
     """
-    try:
-        path = Path(file_path)
+    path = Path(file_path)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
 
+    try:
         # Ensure parent directories exist (e.g., "data/").
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(path, "w", encoding="utf-8") as file_handle:
-            # ensure_ascii=False preserves readable non-ASCII characters.
-            json.dump(data, file_handle, indent=2, ensure_ascii=False)
+        # orjson serializes straight to UTF-8 bytes (no ASCII escaping), so the
+        # whole document is written with a single call.
+        tmp_path.write_bytes(
+            orjson.dumps(
+                data,
+                option=(
+                    orjson.OPT_INDENT_2
+                    | orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_APPEND_NEWLINE
+                ),
+            )
+        )
+        os.replace(tmp_path, path)
 
         logger.info("Successfully saved data to %s", path)
 
     except Exception as exc:
         logger.error("Failed to save JSON to %s: %s", file_path, exc)
+        # Do not leave a partial temporary file next to the target.
+        tmp_path.unlink(missing_ok=True)
         # REVIEW NOTE (not changed): Explicit re-raise preserves original behavior.
         raise exc
 
@@ -62,14 +79,69 @@ def load_json(file_path: Union[str, Path]) -> Optional[Any]:
         return None
 
     try:
-        with open(path, "r", encoding="utf-8") as file_handle:
-            return json.load(file_handle)
+        return orjson.loads(path.read_bytes())
 
-    except json.JSONDecodeError as exc:
+    except orjson.JSONDecodeError as exc:
         logger.error("Invalid JSON format in %s: %s", path, exc)
         return None
 
     except Exception as exc:
         logger.error("Failed to load JSON from %s: %s", path, exc)
         # REVIEW NOTE (not changed): Explicit re-raise preserves original behavior.
-        raise exc
\ No newline at end of file
+        raise exc
+
+
+def append_jsonl(record: Any, file_path: Union[str, Path]) -> None:
+    """Append a single record as one line to a JSON Lines file.
+
+    Appending keeps the write cost proportional to the record rather than to
+    the whole file, which makes JSONL suitable for incremental journals.
+
+    Args:
+        record: JSON-serializable record to append.
+        file_path: Target file path as a string or Path object.
+
+    Raises:
+        Exception: Re-raises any exception encountered during file I/O or
+            serialization, mirroring `save_json`.
+    """
+    try:
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(path, "ab") as file_handle:
+            file_handle.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+
+    except Exception as exc:
+        logger.error("Failed to append JSONL to %s: %s", file_path, exc)
+        raise exc
+
+
+def load_jsonl(file_path: Union[str, Path]) -> List[Any]:
+    """Load all records from a JSON Lines file.
+
+    Returns an empty list when the file does not exist. Lines that cannot be
+    parsed (e.g., a torn final write) are logged and skipped.
+
+    Args:
+        file_path: Source file path as a string or Path object.
+
+    Returns:
+        The deserialized records in file order.
+    """
+    path = Path(file_path)
+
+    if not path.exists():
+        return []
+
+    records: List[Any] = []
+    with open(path, "rb") as file_handle:
+        for line_number, line in enumerate(file_handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(orjson.loads(line))
+            except orjson.JSONDecodeError as exc:
+                logger.error("Skipping invalid JSONL line %s in %s: %s", line_number, path, exc)
+
+    return records
@@ -1,7 +1,12 @@
 import logging
-from typing import Any, Dict, List
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
 
 import tiktoken
+import xxhash
 
 from src.config import settings
 
@@ -9,12 +14,30 @@ logger = logging.getLogger(__name__)
 
 DEFAULT_ENCODING = "cl100k_base"
 
+# ChatML overhead: <|start|>{role/name}\n{content}<|end|>\n
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_NAME = 1
 
+# Every reply is primed with <|start|>assistant<|message|>
+REPLY_PRIMING_TOKENS = 3
+
+# Maximum number of memoized per-string token counts.
+TOKEN_CACHE_SIZE = 4096
+
+# (xxh3 digest, UTF-8 length, model) -> token count.
+TokenCacheKey = Tuple[int, int, str]
+_token_cache: "OrderedDict[TokenCacheKey, int]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
 def get_encoding_for_model(model_name: str) -> tiktoken.Encoding:
     """Return the token encoding associated with a given model name.
 
     If the model name is not recognized by `tiktoken`, this function falls back
-    to the default encoding used by GPT-3.5/GPT-4-class models.
+    to the default encoding used by GPT-3.5/GPT-4-class models. Results are
+    cached per model name, so resolution (and the fallback warning) happens
+    only once.
     """
     try:
         return tiktoken.encoding_for_model(model_name)
@@ -27,6 +50,80 @@ def get_encoding_for_model(model_name: str) -> tiktoken.Encoding:
         return tiktoken.get_encoding(DEFAULT_ENCODING)
 
 
+def _token_cache_key(text: str, model_name: str) -> TokenCacheKey:
+    """Build the token-cache key for a string without retaining the string."""
+    encoded = text.encode("utf-8")
+    return (xxhash.xxh3_64_intdigest(encoded), len(encoded), model_name)
+
+
+def _token_cache_store(key: TokenCacheKey, num_tokens: int) -> None:
+    """Memoize a token count, evicting the least recently used entry when full.
+
+    Must be called with `_token_cache_lock` held.
+    """
+    _token_cache[key] = num_tokens
+    _token_cache.move_to_end(key)
+    if len(_token_cache) > TOKEN_CACHE_SIZE:
+        _token_cache.popitem(last=False)
+
+
+def _count_str_tokens(text: str, model_name: str) -> int:
+    """Return the token length of a string, memoized per (text, model).
+
+    Chat history is append-only, so the same message contents are counted turn
+    after turn; caching makes each distinct string cost one encode. Keys are a
+    stable 64-bit xxh3 digest plus the byte length, so the cache never holds
+    the strings themselves and hashing stays cheap for long messages.
+    """
+    key = _token_cache_key(text, model_name)
+
+    with _token_cache_lock:
+        cached = _token_cache.get(key)
+        if cached is not None:
+            _token_cache.move_to_end(key)
+            return cached
+
+    num_tokens = len(get_encoding_for_model(model_name).encode(text))
+
+    with _token_cache_lock:
+        _token_cache_store(key, num_tokens)
+
+    return num_tokens
+
+
+def _count_str_tokens_batch(texts: List[str], model_name: str) -> List[int]:
+    """Return the token lengths of many strings, encoding cache misses at once.
+
+    Misses go through a single `encode_batch` call, which encodes in parallel
+    outside the GIL; hits never reach the encoder.
+    """
+    keys = [_token_cache_key(text, model_name) for text in texts]
+    counts: Dict[TokenCacheKey, int] = {}
+    misses: Dict[TokenCacheKey, str] = {}
+
+    with _token_cache_lock:
+        for key, text in zip(keys, texts):
+            cached = _token_cache.get(key)
+            if cached is not None:
+                _token_cache.move_to_end(key)
+                counts[key] = cached
+            else:
+                misses[key] = text
+
+    if misses:
+        encoded = get_encoding_for_model(model_name).encode_batch(
+            list(misses.values()),
+            num_threads=os.cpu_count() or 4,
+        )
+
+        with _token_cache_lock:
+            for key, tokens in zip(misses, encoded):
+                counts[key] = len(tokens)
+                _token_cache_store(key, len(tokens))
+
+    return [counts[key] for key in keys]
+
+
 def count_tokens(text: str, model_name: str = settings.MODEL_NAME) -> int:
     """Count the number of tokens in a plain text string.
 
@@ -35,8 +132,56 @@ def count_tokens(text: str, model_name: str = settings.MODEL_NAME) -> int:
     if not text:
         return 0
 
-    encoding = get_encoding_for_model(model_name)
-    return len(encoding.encode(text))
+    return _count_str_tokens(text, model_name)
+
+
+def max_messages_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Return a cheap upper bound on `count_messages_tokens` without encoding.
+
+    Every token covers at least one UTF-8 byte, so an ASCII string never has
+    more tokens than characters and any other string never has more than four
+    tokens per character (the widest UTF-8 code point).
+    """
+    # Mirrors the ChatML overhead used by `count_messages_tokens`.
+    upper_bound = len(messages) * TOKENS_PER_MESSAGE + REPLY_PRIMING_TOKENS
+
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            upper_bound += len(content) if content.isascii() else 4 * len(content)
+
+        name = message.get("name")
+        if isinstance(name, str):
+            upper_bound += (len(name) if name.isascii() else 4 * len(name)) + TOKENS_PER_NAME
+
+    return upper_bound
+
+
+def count_message_tokens(
+    message: Dict[str, Any],
+    model_name: str = settings.MODEL_NAME,
+) -> int:
+    """Count the tokens a single chat message contributes to a ChatML prompt.
+
+    Includes the fixed per-message overhead and the per-name overhead, but not
+    the reply priming added once per prompt (see `REPLY_PRIMING_TOKENS`).
+    """
+    # Only the standard OpenAI fields are counted, to avoid inflating totals
+    # with internal or diagnostic metadata (e.g., debug_info).
+    num_tokens = TOKENS_PER_MESSAGE
+
+    content = message.get("content")
+    if isinstance(content, str):
+        num_tokens += _count_str_tokens(content, model_name)
+
+    name = message.get("name")
+    if isinstance(name, str):
+        num_tokens += _count_str_tokens(name, model_name) + TOKENS_PER_NAME
+
+    # REVIEW NOTE (not changed): Function-calling fields are intentionally
+    # excluded and would require explicit handling if introduced.
+
+    return num_tokens
 
 
 def count_messages_tokens(
@@ -46,33 +191,23 @@ def count_messages_tokens(
     """Count the total number of tokens for a list of chat messages.
 
     This implementation follows OpenAI's ChatML accounting rules, including
-    fixed overhead per message and per name field.
+    fixed overhead per message and per name field. All field values are
+    counted in one batch, matching `count_message_tokens` per message.
     """
-    encoding = get_encoding_for_model(model_name)
-
-    # ChatML overhead:
-    # <|start|>{role/name}\n{content}<|end|>\n
-    tokens_per_message = 3
-    tokens_per_name = 1
-
-    num_tokens = 0
+    texts: List[str] = []
+    num_tokens = len(messages) * TOKENS_PER_MESSAGE + REPLY_PRIMING_TOKENS
 
     for message in messages:
-        num_tokens += tokens_per_message
-
-        for key, value in message.items():
-            # Only count standard OpenAI fields to avoid inflating totals
-            # with internal or diagnostic metadata.
-            if key in ["content", "name"] and isinstance(value, str):
-                num_tokens += len(encoding.encode(value))
-
-                if key == "name":
-                    num_tokens += tokens_per_name
+        content = message.get("content")
+        if isinstance(content, str):
+            texts.append(content)
 
-            # REVIEW NOTE (not changed): Function-calling fields are intentionally
-            # excluded and would require explicit handling if introduced.
+        name = message.get("name")
+        if isinstance(name, str):
+            texts.append(name)
+            num_tokens += TOKENS_PER_NAME
 
-    # Every reply is primed with <|start|>assistant<|message|>
-    num_tokens += 3
+    if texts:
+        num_tokens += sum(_count_str_tokens_batch(texts, model_name))
 
-    return num_tokens
\ No newline at end of file
+    return num_tokens
@@ -0,0 +1,57 @@
+import os
+from typing import List
+
+import pytest
+
+# Settings are validated at import time; no request is sent by these tests.
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from src.utils.fast_extract import fast_extract  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    ("text", "facts", "preferences"),
+    [
+        ("My name is Huy", ["User name is Huy"], []),
+        ("I'm a software engineer at Google", ["User is a software engineer"], []),
+        (
+            "I am an AI Engineer using Python most of the time and I really hate "
+            "Java due to its complexity",
+            ["User is an AI Engineer"],
+            ["Hates Java"],
+        ),
+        ("I prefer concise answers", [], ["Prefers concise answers"]),
+        ("I love C++ and Rust", [], ["Loves C++"]),
+        ("I don't like Java.", [], ["Dislikes Java"]),
+        ("Never use Java", [], ["Avoids Java"]),
+    ],
+)
+def test_fast_extract_matches(text: str, facts: List[str], preferences: List[str]) -> None:
+    analysis = fast_extract(text)
+
+    assert analysis is not None
+    assert not analysis.is_ambiguous
+    assert analysis.new_user_facts == facts
+    assert analysis.new_user_preferences == preferences
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # Function words or pronouns as objects.
+        "I like to code in Python",
+        "I hate when you do that",
+        "I don't use it much",
+        "I like the new layout",
+        # Lowercase words are not names.
+        "my name is not important",
+        # Quantified states are not roles.
+        "I am a bit tired",
+        "I'm a little confused",
+        "I am a lot busier today",
+        # No first-person statement at all.
+        "Write a Hello World function for me",
+    ],
+)
+def test_fast_extract_defers_to_llm(text: str) -> None:
+    assert fast_extract(text) is None
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+# Settings are validated at import time; no request is sent by these tests.
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from src.core.pipeline import QueryPipeline  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "what's 2+2",
+        "Explain quicksort",
+        "How many bytes are in a kilobyte?",
+    ],
+)
+def test_skip_analysis_for_self_contained_queries(query: str) -> None:
+    analysis = QueryPipeline._skip_analysis(query)
+
+    assert analysis is not None
+    assert not analysis.is_ambiguous
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        # Imperative constraints and preferences.
+        "Be concise.",
+        "Always answer in Python",
+        "Never use Java",
+        # First-person facts, including non-English ones.
+        "My name is Huy",
+        "Tên tôi là Huy",
+        # Context-dependent references.
+        "Fix the bug",
+        "Explain the error",
+        "How about next week?",
+        "what is it",
+        # Elliptical follow-ups.
+        "Why?",
+        "Continue",
+        "How about Go?",
+        "What about Rust?",
+        "More examples",
+        "And in Java?",
+    ],
+)
+def test_analyze_queries_that_may_carry_signals_or_references(query: str) -> None:
+    assert QueryPipeline._skip_analysis(query) is None